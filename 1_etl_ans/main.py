@@ -7,11 +7,17 @@ import re
 from urllib.parse import urljoin
 import shutil
 import traceback
+import sys
+
+# Modulo compartilhado do pipeline (raiz do repositorio)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artefatos_zip import salvar_csv_zip
 
 BASE_URL = "https://dadosabertos.ans.gov.br/FTP/PDA/"
 OUTPUT_DIR = "downloads"
-FINAL_CSV = os.path.join("output", "consolidado_despesas.csv")
 FINAL_ZIP = os.path.join("output", "consolidado_despesas.zip")
+# Copia colunar para o modo embarcado (DuckDB) da API
+FINAL_PARQUET = os.path.join("output", "consolidado_despesas.parquet")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs("output", exist_ok=True)
@@ -250,10 +256,8 @@ if __name__ == '__main__':
 
         cols_para_salvar = ['RegistroANS', 'CNPJ', 'RazaoSocial', 'Ano', 'Trimestre', 'ValorDespesas']
 
-        df[cols_para_salvar].to_csv(FINAL_CSV, index=False, sep=';', encoding='utf-8')
-
-        with zipfile.ZipFile(FINAL_ZIP, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.write(FINAL_CSV, arcname="consolidado_despesas.csv")
+        salvar_csv_zip(df[cols_para_salvar], FINAL_ZIP, "consolidado_despesas.csv", sep=';')
+        df[cols_para_salvar].to_parquet(FINAL_PARQUET, index=False)
 
         shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
         print("TAREFA 1 CONCLUÍDA (Com RegistroANS preservado!).")
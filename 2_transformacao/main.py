@@ -1,24 +1,39 @@
 import pandas as pd
 import requests
 import os
-import zipfile
 import re
+import json
+import hashlib
+from datetime import datetime, timedelta
 from io import StringIO
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import sys
 
+# Modulo compartilhado do pipeline (raiz do repositorio)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artefatos_zip import salvar_csv_zip, abrir_csv_zip
+
 # --- CONFIGURACOES ---
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-INPUT_FILE = os.path.abspath(os.path.join(CURRENT_DIR, "..", "1_etl_ans", "output", "consolidado_despesas.csv"))
+INPUT_FILE = os.path.abspath(os.path.join(CURRENT_DIR, "..", "1_etl_ans", "output", "consolidado_despesas.zip"))
 BASE_FTP = "https://dadosabertos.ans.gov.br/FTP/PDA/"
 OUTPUT_DIR = "output"
-OUTPUT_CSV = os.path.join(OUTPUT_DIR, "despesas_agregadas.csv")
 OUTPUT_ZIP = os.path.join(OUTPUT_DIR, "Teste_JoaoGabriel.zip")
 # Caminho para persistir o CADOP bruto para uso na tarefa de Banco de Dados
 OUTPUT_CADOP = os.path.join(OUTPUT_DIR, "relatorio_cadop.csv")
+# Copia colunar do CADOP para o modo embarcado (DuckDB) da API
+OUTPUT_CADOP_PARQUET = os.path.join(OUTPUT_DIR, "relatorio_cadop.parquet")
+# Cache do CADOP: registro tipado (Parquet) e metadados HTTP da ultima carga
+CACHE_DIR = "cache"
+CACHE_CADOP = os.path.join(CACHE_DIR, "cadop.parquet")
+CACHE_CADOP_META = os.path.join(CACHE_DIR, "cadop_meta.json")
+# A URL do CADOP em cache e revalidada via scraping apos este prazo (o arquivo pode mudar de nome no FTP)
+CADOP_URL_TTL_DIAS = int(os.getenv("CADOP_URL_TTL_DIAS", "7"))
+COLUNAS_CADOP = ['RegistroANS', 'CNPJ', 'RazaoSocial', 'Modalidade', 'UF']
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
 
 
 def validar_cnpj(cnpj):
@@ -75,41 +90,128 @@ def obter_url_cadop_dinamica():
         return None
 
 
-def baixar_cadop():
-    '''Baixa, processa e salva o arquivo de operadoras'''
-    print("Iniciando download do Cadastro de Operadoras (CADOP)...")
+def carregar_meta_cadop():
+    '''Le os metadados da ultima carga do CADOP (URL, ETag, Last-Modified, hash)'''
+    if not os.path.exists(CACHE_CADOP_META) or not os.path.exists(CACHE_CADOP):
+        return {}
+    try:
+        with open(CACHE_CADOP_META, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Aviso: metadados do cache CADOP invalidos ({e}). Ignorando cache.")
+        return {}
+
+
+def salvar_meta_cadop(meta):
+    with open(CACHE_CADOP_META, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def resolver_url_cadop(meta):
+    '''Usa a URL da ultima carga enquanto estiver dentro do TTL; depois refaz o scraping'''
+    verificada_em = meta.get('url_verificada_em')
+    if meta.get('url') and verificada_em:
+        if datetime.now() - datetime.fromisoformat(verificada_em) < timedelta(days=CADOP_URL_TTL_DIAS):
+            return meta['url'], verificada_em
+
     url = obter_url_cadop_dinamica()
-    if not url: raise Exception("URL CADOP nao encontrada.")
+    if url:
+        return url, datetime.now().isoformat(timespec='seconds')
+
+    # Scraping falhou: segue com a URL antiga, sem renovar a verificacao
+    return meta.get('url'), verificada_em
 
+
+def requisitar_cadop(url, meta):
+    '''GET condicional: envia ETag/Last-Modified da ultima carga quando a URL e a mesma'''
+    headers = {}
+    if meta.get('url') == url:
+        if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+    return requests.get(url, headers=headers, timeout=60)
+
+
+def parsear_cadop(conteudo):
+    '''Decodifica o CSV bruto do CADOP e devolve apenas as colunas uteis'''
     try:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
+        texto_csv = conteudo.decode('latin-1')
+    except UnicodeDecodeError:
+        texto_csv = conteudo.decode('cp1252', errors='replace')
 
-        try:
-            texto_csv = response.content.decode('latin-1')
-        except UnicodeDecodeError:
-            texto_csv = response.content.decode('cp1252', errors='replace')
+    df = pd.read_csv(StringIO(texto_csv), sep=';', dtype=str, on_bad_lines='skip')
 
-        df = pd.read_csv(StringIO(texto_csv), sep=';', dtype=str, on_bad_lines='skip')
+    # Normalizacao de colunas
+    df.columns = [c.strip().upper().replace('RAZAO_SOCIAL', 'RazaoSocial') for c in df.columns]
+    col_map = {
+        'REGISTRO_OPERADORA': 'RegistroANS',
+        'REGISTRO_ANS': 'RegistroANS', 'REG_ANS': 'RegistroANS', 'CD_OPS': 'RegistroANS', 'CODIGO': 'RegistroANS',
+        'CNPJ': 'CNPJ', 'RAZAO_SOCIAL': 'RazaoSocial', 'MODALIDADE': 'Modalidade', 'UF': 'UF'
+    }
+    df = df.rename(columns={k: v for k, v in col_map.items() if k in df.columns})
 
-        # Normalizacao de colunas
-        df.columns = [c.strip().upper().replace('RAZAO_SOCIAL', 'RazaoSocial') for c in df.columns]
-        col_map = {
-            'REGISTRO_OPERADORA': 'RegistroANS',
-            'REGISTRO_ANS': 'RegistroANS', 'REG_ANS': 'RegistroANS', 'CD_OPS': 'RegistroANS', 'CODIGO': 'RegistroANS',
-            'CNPJ': 'CNPJ', 'RAZAO_SOCIAL': 'RazaoSocial', 'MODALIDADE': 'Modalidade', 'UF': 'UF'
-        }
-        df = df.rename(columns={k: v for k, v in col_map.items() if k in df.columns})
+    if 'RegistroANS' not in df.columns: raise Exception("Coluna RegistroANS nao encontrada no CADOP.")
+
+    # Seleciona apenas colunas uteis
+    return df[[c for c in COLUNAS_CADOP if c in df.columns]]
+
+
+def salvar_saidas_cadop(df):
+    print(f"Salvando copia local do CADOP: {OUTPUT_CADOP}")
+    df.to_csv(OUTPUT_CADOP, index=False, sep=';', encoding='utf-8')
+    df.to_parquet(OUTPUT_CADOP_PARQUET, index=False)
+
+
+def baixar_cadop():
+    '''Baixa, processa e salva o arquivo de operadoras.
+
+    Usa GET condicional (ETag/If-Modified-Since) e hash SHA-256 do conteudo para
+    evitar download e parse quando o CADOP nao mudou; o registro processado fica
+    em cache Parquet. O delta de operadoras e calculado na Tarefa 3, contra o banco'''
+    print("Iniciando download do Cadastro de Operadoras (CADOP)...")
+    meta = carregar_meta_cadop()
+
+    # Reaproveita a URL da ultima carga (dentro do TTL) para evitar novo scraping do FTP
+    url, url_verificada_em = resolver_url_cadop(meta)
+    if not url: raise Exception("URL CADOP nao encontrada.")
+
+    try:
+        response = requisitar_cadop(url, meta)
+        if response.status_code == 404 and meta.get('url'):
+            print("URL em cache nao existe mais. Refazendo scraping...")
+            url = obter_url_cadop_dinamica()
+            if not url: raise Exception("URL CADOP nao encontrada.")
+            url_verificada_em = datetime.now().isoformat(timespec='seconds')
+            response = requisitar_cadop(url, meta)
+
+        df_cache = pd.read_parquet(CACHE_CADOP) if meta else None
+
+        if response.status_code == 304:
+            print("CADOP nao modificado desde a ultima carga (HTTP 304). Usando cache.")
+            salvar_saidas_cadop(df_cache)
+            salvar_meta_cadop({**meta, 'url_verificada_em': url_verificada_em})
+            return df_cache
 
-        if 'RegistroANS' not in df.columns: raise Exception("Coluna RegistroANS nao encontrada no CADOP.")
+        response.raise_for_status()
 
-        # Seleciona apenas colunas uteis
-        cols = ['RegistroANS', 'CNPJ', 'RazaoSocial', 'Modalidade', 'UF']
-        df_limpo = df[[c for c in cols if c in df.columns]]
+        conteudo_hash = hashlib.sha256(response.content).hexdigest()
+        meta_nova = {
+            'url': url,
+            'url_verificada_em': url_verificada_em,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': conteudo_hash,
+            'atualizado_em': datetime.now().isoformat(timespec='seconds'),
+        }
 
-        print(f"Salvando copia local do CADOP: {OUTPUT_CADOP}")
+        if df_cache is not None and meta.get('sha256') == conteudo_hash:
+            print("Conteudo do CADOP identico ao cache (SHA-256). Pulando processamento.")
+            df_limpo = df_cache
+        else:
+            df_limpo = parsear_cadop(response.content)
+            df_limpo.to_parquet(CACHE_CADOP, index=False)
 
-        df_limpo.to_csv(OUTPUT_CADOP, index=False, sep=';', encoding='utf-8')
+        salvar_saidas_cadop(df_limpo)
+        salvar_meta_cadop(meta_nova)
 
         return df_limpo
 
@@ -157,7 +259,9 @@ if __name__ == "__main__":
         if not os.path.exists(INPUT_FILE):
             raise FileNotFoundError("Arquivo da Tarefa 1 nao encontrado. Execute a etapa anterior primeiro.")
 
-        df_raw = pd.read_csv(INPUT_FILE, sep=";", dtype=str, encoding='utf-8')
+        # Le o CSV direto do ZIP da Tarefa 1, conferindo os blocos do manifesto durante a leitura
+        with abrir_csv_zip(INPUT_FILE) as arquivo_csv:
+            df_raw = pd.read_csv(arquivo_csv, sep=";", dtype=str, encoding='utf-8')
 
         df_raw = df_raw.drop(columns=['CNPJ', 'RazaoSocial'], errors='ignore')
 
@@ -174,11 +278,8 @@ if __name__ == "__main__":
         # Agregacao Final
         df_final = processar_agregacao(df_enriched)
 
-        print(f"Salvando Agregado: {OUTPUT_CSV}")
-        df_final.to_csv(OUTPUT_CSV, index=False, sep=';', encoding='utf-8', float_format='%.2f')
-
-        with zipfile.ZipFile(OUTPUT_ZIP, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.write(OUTPUT_CSV, arcname="despesas_agregadas.csv")
+        print(f"Salvando Agregado: {OUTPUT_ZIP}")
+        salvar_csv_zip(df_final, OUTPUT_ZIP, "despesas_agregadas.csv", sep=';', float_format='%.2f')
 
         print("TAREFA 2 CONCLUIDA COM SUCESSO.")
 
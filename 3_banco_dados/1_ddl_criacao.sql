@@ -19,6 +19,8 @@ CREATE TABLE IF NOT EXISTS despesas_contabeis (
 );
 
 -- Índices
+-- Busca por CNPJ somente com digitos (endpoints por CNPJ e consulta em lote da API)
+CREATE INDEX idx_operadoras_cnpj_digitos ON operadoras ((REGEXP_REPLACE(cnpj, '\D','','g')));
 CREATE INDEX idx_despesas_ano_tri ON despesas_contabeis(ano, trimestre);
 CREATE INDEX idx_despesas_operadora ON despesas_contabeis(registro_ans);
 
@@ -31,4 +33,30 @@ CREATE TABLE IF NOT EXISTS despesas_agregadas_final (
     valor_total DECIMAL(15, 2),
     media_trimestral DECIMAL(15, 2),
     desvio_padrao DECIMAL(15, 2)
-);
\ No newline at end of file
+);
+
+-- 4. Serie Trimestral por Operadora (Data Mart analitico)
+-- Grade densa operadora x trimestre com LAG, crescimento e comparacao com a media ja calculados
+-- Trimestres sem dados entram com valor 0 (possui_dados = false); valor_primeiro_trimestre e ultimo_trimestre
+-- referem-se ao primeiro/ultimo trimestre com dados da propria operadora
+CREATE TABLE IF NOT EXISTS serie_trimestral_operadora (
+    registro_ans INT NOT NULL,
+    ano INT NOT NULL,
+    trimestre INT NOT NULL,
+    data_referencia DATE NOT NULL,
+    valor_despesa DECIMAL(15, 2) NOT NULL,
+    possui_dados BOOLEAN NOT NULL,
+    valor_trimestre_anterior DECIMAL(15, 2),
+    variacao_trimestral_pct DECIMAL(15, 2),
+    valor_primeiro_trimestre DECIMAL(15, 2),
+    crescimento_acumulado_pct DECIMAL(15, 2),
+    media_trimestre DECIMAL(15, 2) NOT NULL,
+    acima_media BOOLEAN NOT NULL,
+    qtd_trimestres_acima INT NOT NULL,
+    ultimo_trimestre BOOLEAN NOT NULL,
+    PRIMARY KEY (registro_ans, ano, trimestre),
+    CONSTRAINT fk_serie_operadora FOREIGN KEY (registro_ans) REFERENCES operadoras(registro_ans)
+);
+
+CREATE INDEX idx_serie_ano_tri ON serie_trimestral_operadora(ano, trimestre);
+CREATE INDEX idx_serie_ultimo ON serie_trimestral_operadora(registro_ans) WHERE ultimo_trimestre;
\ No newline at end of file
@@ -1,4 +1,5 @@
 -- Limpa tabelas antes de começar
+TRUNCATE TABLE serie_trimestral_operadora;
 TRUNCATE TABLE despesas_agregadas_final;
 TRUNCATE TABLE despesas_contabeis CASCADE;
 TRUNCATE TABLE operadoras CASCADE;
@@ -9,7 +10,7 @@ CREATE TEMP TABLE staging_cadop (
 );
 
 COPY staging_cadop FROM '{PATH_CADOP}'
-WITH (FORMAT csv, HEADER true, DELIMITER ';', ENCODING 'LATIN1');
+WITH (FORMAT csv, HEADER true, DELIMITER ';', ENCODING 'UTF8');
 
 INSERT INTO operadoras (registro_ans, cnpj, razao_social, modalidade, uf)
 SELECT DISTINCT
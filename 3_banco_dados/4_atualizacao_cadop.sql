@@ -0,0 +1,98 @@
+-- Atualizacao incremental da tabela OPERADORAS: o CADOP atual da Tarefa 2 e comparado com o que ja esta no banco,
+-- entao nenhuma mudanca se perde se a Tarefa 2 rodar mais de uma vez ou se uma carga anterior falhar
+CREATE TEMP TABLE staging_cadop (
+    registro_ans TEXT, cnpj TEXT, razao_social TEXT, modalidade TEXT, uf TEXT
+);
+
+COPY staging_cadop FROM '{PATH_CADOP}'
+WITH (FORMAT csv, HEADER true, DELIMITER ';', ENCODING 'UTF8');
+
+-- Despesas atuais da Tarefa 1 (usadas para as operadoras novas)
+CREATE TEMP TABLE staging_despesas (
+    registro_ans TEXT, cnpj TEXT, razao_social TEXT, ano INT, trimestre INT, valor TEXT
+);
+
+COPY staging_despesas FROM '{PATH_DESPESAS}'
+WITH (FORMAT csv, HEADER true, DELIMITER ';', ENCODING 'UTF8');
+
+-- O delta so e valido se a Tarefa 1 cobre os mesmos trimestres ja carregados; caso contrario o banco
+-- misturaria periodos (operadoras antigas com os trimestres da ultima carga completa, novas com os atuais)
+DO $$
+BEGIN
+    IF EXISTS (
+        (SELECT DISTINCT ano, trimestre FROM staging_despesas
+         EXCEPT SELECT DISTINCT ano, trimestre FROM despesas_contabeis)
+        UNION ALL
+        (SELECT DISTINCT ano, trimestre FROM despesas_contabeis
+         EXCEPT SELECT DISTINCT ano, trimestre FROM staging_despesas)
+    ) THEN
+        RAISE EXCEPTION 'Os trimestres da Tarefa 1 mudaram desde a ultima carga completa. Execute "python main.py" (sem --delta-cadop).';
+    END IF;
+END $$;
+
+-- Mesmas regras de limpeza da carga completa (2_importacao.sql)
+CREATE TEMP TABLE cadop_atual AS
+SELECT DISTINCT ON (registro_ans) registro_ans, cnpj, razao_social, modalidade, uf
+FROM (
+    SELECT
+        CAST(NULLIF(REGEXP_REPLACE(registro_ans, '\D','','g'), '') AS INTEGER) AS registro_ans,
+        cnpj,
+        razao_social,
+        modalidade,
+        CASE WHEN LENGTH(uf) > 2 THEN LEFT(uf, 2) ELSE NULLIF(uf, 'N/A') END AS uf
+    FROM staging_cadop
+    WHERE registro_ans IS NOT NULL
+) s
+WHERE registro_ans IS NOT NULL
+ORDER BY registro_ans;
+
+-- 1. DELTA: inseridas, alteradas e removidas em relacao ao banco
+CREATE TEMP TABLE cadop_delta AS
+SELECT 'INSERIDA' AS operacao, n.registro_ans
+FROM cadop_atual n
+LEFT JOIN operadoras o ON o.registro_ans = n.registro_ans
+WHERE o.registro_ans IS NULL
+UNION ALL
+SELECT 'ALTERADA', n.registro_ans
+FROM cadop_atual n
+JOIN operadoras o ON o.registro_ans = n.registro_ans
+WHERE (n.cnpj, n.razao_social, n.modalidade, n.uf)
+      IS DISTINCT FROM (o.cnpj::TEXT, o.razao_social::TEXT, o.modalidade::TEXT, o.uf::TEXT)
+UNION ALL
+SELECT 'REMOVIDA', o.registro_ans
+FROM operadoras o
+LEFT JOIN cadop_atual n ON n.registro_ans = o.registro_ans
+WHERE n.registro_ans IS NULL;
+
+-- 2. Operadoras novas ou com cadastro alterado
+INSERT INTO operadoras (registro_ans, cnpj, razao_social, modalidade, uf)
+SELECT n.registro_ans, n.cnpj, n.razao_social, n.modalidade, n.uf
+FROM cadop_atual n
+JOIN cadop_delta d ON d.registro_ans = n.registro_ans AND d.operacao IN ('INSERIDA', 'ALTERADA')
+ON CONFLICT (registro_ans) DO UPDATE SET
+    cnpj = EXCLUDED.cnpj,
+    razao_social = EXCLUDED.razao_social,
+    modalidade = EXCLUDED.modalidade,
+    uf = EXCLUDED.uf;
+
+-- 3. Despesas das operadoras novas (a carga completa so importa despesas de operadoras cadastradas)
+INSERT INTO despesas_contabeis (registro_ans, ano, trimestre, data_referencia, valor_despesa)
+SELECT
+    d.registro_ans,
+    s.ano, s.trimestre,
+    MAKE_DATE(s.ano, ((s.trimestre - 1) * 3) + 1, 1),
+    CAST(REPLACE(s.valor, ',', '.') AS DECIMAL(15,2))
+FROM staging_despesas s
+JOIN cadop_delta d
+  ON CAST(NULLIF(REGEXP_REPLACE(s.registro_ans, '\D','','g'), '') AS INTEGER) = d.registro_ans
+ AND d.operacao = 'INSERIDA';
+
+-- 4. Operadoras removidas do cadastro (mesmo efeito da carga completa, que so importa despesas de operadoras ativas)
+-- A serie trimestral e refeita inteira logo em seguida (5_serie_trimestral.sql): medias e comparacoes mudam para todos
+TRUNCATE TABLE serie_trimestral_operadora;
+
+DELETE FROM despesas_contabeis
+WHERE registro_ans IN (SELECT registro_ans FROM cadop_delta WHERE operacao = 'REMOVIDA');
+
+DELETE FROM operadoras
+WHERE registro_ans IN (SELECT registro_ans FROM cadop_delta WHERE operacao = 'REMOVIDA');
@@ -0,0 +1,66 @@
+-- CARGA SERIE TRIMESTRAL (pre-calculo das queries analiticas)
+-- Executado apos a carga de despesas_contabeis, tanto no PostgreSQL quanto no DuckDB
+INSERT INTO serie_trimestral_operadora (
+    registro_ans, ano, trimestre, data_referencia, valor_despesa, possui_dados,
+    valor_trimestre_anterior, variacao_trimestral_pct,
+    valor_primeiro_trimestre, crescimento_acumulado_pct,
+    media_trimestre, acima_media, qtd_trimestres_acima, ultimo_trimestre
+)
+WITH totais AS (
+    SELECT registro_ans, ano, trimestre, data_referencia, SUM(valor_despesa) AS total
+    FROM despesas_contabeis
+    GROUP BY registro_ans, ano, trimestre, data_referencia
+),
+limites AS (
+    -- Primeiro e ultimo trimestre COM DADOS de cada operadora (base do crescimento, como na QUERY 1)
+    SELECT registro_ans, MIN(data_referencia) AS primeira, MAX(data_referencia) AS ultima
+    FROM totais
+    GROUP BY registro_ans
+),
+trimestres AS (
+    SELECT DISTINCT ano, trimestre, data_referencia FROM despesas_contabeis
+),
+medias AS (
+    -- Media dos TOTAIS trimestrais por operadora (a QUERY 3 usa a media das linhas de despesas_contabeis)
+    SELECT ano, trimestre, AVG(total) AS media
+    FROM totais
+    GROUP BY ano, trimestre
+),
+grade AS (
+    -- Grade densa: operadora sem despesa no trimestre entra com valor 0 (possui_dados = false).
+    -- O zero vale para LAG/variacao trimestral e comparacao com a media; o crescimento acumulado ignora esses trimestres
+    SELECT
+        l.registro_ans, t.ano, t.trimestre, t.data_referencia,
+        COALESCE(x.total, 0) AS valor_despesa,
+        x.total IS NOT NULL AS possui_dados,
+        m.media AS media_trimestre,
+        p.total AS valor_primeiro,
+        t.data_referencia = l.ultima AS ultimo_trimestre
+    FROM limites l
+    JOIN totais p ON p.registro_ans = l.registro_ans AND p.data_referencia = l.primeira
+    CROSS JOIN trimestres t
+    JOIN medias m ON m.ano = t.ano AND m.trimestre = t.trimestre
+    LEFT JOIN totais x ON x.registro_ans = l.registro_ans AND x.ano = t.ano AND x.trimestre = t.trimestre
+),
+janelas AS (
+    SELECT
+        g.*,
+        LAG(valor_despesa) OVER w AS valor_anterior,
+        SUM(CASE WHEN valor_despesa > media_trimestre THEN 1 ELSE 0 END)
+            OVER (PARTITION BY registro_ans) AS qtd_acima
+    FROM grade g
+    WINDOW w AS (PARTITION BY registro_ans ORDER BY data_referencia)
+)
+SELECT
+    registro_ans, ano, trimestre, data_referencia, valor_despesa, possui_dados,
+    valor_anterior,
+    ROUND(((valor_despesa - valor_anterior) / NULLIF(valor_anterior, 0)) * 100, 2),
+    valor_primeiro,
+    CASE WHEN possui_dados
+         THEN ROUND(((valor_despesa - valor_primeiro) / NULLIF(valor_primeiro, 0)) * 100, 2)
+    END,
+    ROUND(media_trimestre, 2),
+    valor_despesa > media_trimestre,
+    qtd_acima,
+    ultimo_trimestre
+FROM janelas;
\ No newline at end of file
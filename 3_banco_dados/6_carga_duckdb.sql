@@ -0,0 +1,50 @@
+-- Carga do banco embarcado (DuckDB) direto dos Parquet das Tarefas 1 e 2.
+-- Mesmas regras de limpeza de 2_importacao.sql, para que a API responda igual ao PostgreSQL.
+
+-- 1. OPERADORAS
+CREATE TABLE operadoras AS
+SELECT registro_ans, cnpj, razao_social, modalidade, uf
+FROM (
+    SELECT
+        CAST(NULLIF(REGEXP_REPLACE(RegistroANS, '\D','','g'), '') AS INTEGER) AS registro_ans,
+        CAST(CNPJ AS VARCHAR(20)) AS cnpj,
+        CAST(RazaoSocial AS VARCHAR(255)) AS razao_social,
+        CAST(Modalidade AS VARCHAR(100)) AS modalidade,
+        CASE WHEN LENGTH(UF) > 2 THEN LEFT(UF, 2) ELSE NULLIF(UF, 'N/A') END AS uf
+    FROM read_parquet('{PATH_CADOP}')
+    WHERE RegistroANS IS NOT NULL
+)
+WHERE registro_ans IS NOT NULL
+QUALIFY ROW_NUMBER() OVER (PARTITION BY registro_ans) = 1;
+
+-- 2. DESPESAS
+CREATE TABLE despesas_contabeis AS
+SELECT
+    CAST(ROW_NUMBER() OVER () AS INTEGER) AS id,
+    o.registro_ans,
+    CAST(s.Ano AS INTEGER) AS ano,
+    CAST(s.Trimestre AS INTEGER) AS trimestre,
+    MAKE_DATE(CAST(s.Ano AS INTEGER), ((CAST(s.Trimestre AS INTEGER) - 1) * 3) + 1, 1) AS data_referencia,
+    -- Via texto, como o COPY do PostgreSQL: DOUBLE -> DECIMAL direto arredonda diferente (ex: 1.005 -> 1.00)
+    CAST(CAST(s.ValorDespesas AS VARCHAR) AS DECIMAL(15,2)) AS valor_despesa
+FROM read_parquet('{PATH_DESPESAS}') s
+JOIN operadoras o ON CAST(NULLIF(REGEXP_REPLACE(s.RegistroANS, '\D','','g'), '') AS INTEGER) = o.registro_ans;
+
+-- 3. SERIE TRIMESTRAL (preenchida por 5_serie_trimestral.sql)
+CREATE TABLE serie_trimestral_operadora (
+    registro_ans INT NOT NULL,
+    ano INT NOT NULL,
+    trimestre INT NOT NULL,
+    data_referencia DATE NOT NULL,
+    valor_despesa DECIMAL(15, 2) NOT NULL,
+    possui_dados BOOLEAN NOT NULL,
+    valor_trimestre_anterior DECIMAL(15, 2),
+    variacao_trimestral_pct DECIMAL(15, 2),
+    valor_primeiro_trimestre DECIMAL(15, 2),
+    crescimento_acumulado_pct DECIMAL(15, 2),
+    media_trimestre DECIMAL(15, 2) NOT NULL,
+    acima_media BOOLEAN NOT NULL,
+    qtd_trimestres_acima INT NOT NULL,
+    ultimo_trimestre BOOLEAN NOT NULL,
+    PRIMARY KEY (registro_ans, ano, trimestre)
+);
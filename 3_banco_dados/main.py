@@ -6,6 +6,10 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv  # MODIFICACAO: Import explícito necessário
 
+# Modulo compartilhado do pipeline (raiz do repositorio)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artefatos_zip import verificar_csv_zip
+
 # Carrega variaveis de ambiente
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
@@ -93,11 +97,18 @@ def preparar_arquivos_para_postgres(mapa_originais):
                 f"Certifique-se de ter executado as Tarefas 1 e 2 com sucesso."
             )
 
-        nome_arquivo = os.path.basename(caminho_original)
-        caminho_temp = os.path.join(temp_dir, nome_arquivo)
+        if caminho_original.lower().endswith('.zip'):
+            # Artefatos das Tarefas 1 e 2 so existem compactados: extrai o CSV na pasta temporaria
+            # conferindo o CRC32 de cada bloco contra o manifesto
+            caminho_temp = os.path.join(temp_dir, os.path.splitext(os.path.basename(caminho_original))[0] + ".csv")
+            with open(caminho_temp, 'wb') as destino:
+                verificar_csv_zip(caminho_original, destino)
+        else:
+            nome_arquivo = os.path.basename(caminho_original)
+            caminho_temp = os.path.join(temp_dir, nome_arquivo)
 
-        # Copia o arquivo
-        shutil.copy2(caminho_original, caminho_temp)
+            # Copia o arquivo
+            shutil.copy2(caminho_original, caminho_temp)
 
         try:
             os.chmod(caminho_temp, 0o666)
@@ -123,14 +134,49 @@ def executar_sql_arquivo(cursor, arquivo_sql, placeholders=None):
         print("   -> Sucesso.")
 
 
+def atualizar_operadoras_delta(base_dir, root_dir):
+    '''Compara o CADOP atual com a tabela operadoras e aplica so o delta (inseridas/alteradas/removidas)'''
+    mapa_paths = {
+        '{PATH_CADOP}': os.path.join(root_dir, "2_transformacao", "output", "relatorio_cadop.csv"),
+        '{PATH_DESPESAS}': os.path.join(root_dir, "1_etl_ans", "output", "consolidado_despesas.zip"),
+    }
+    paths_seguros = preparar_arquivos_para_postgres(mapa_paths)
+
+    conn = get_db_connection(DB_NAME)
+    cur = conn.cursor()
+    try:
+        # Transacao unica: ou o delta inteiro e aplicado, ou nada muda
+        executar_sql_arquivo(cur, os.path.join(base_dir, "4_atualizacao_cadop.sql"), paths_seguros)
+        executar_sql_arquivo(cur, os.path.join(base_dir, "5_serie_trimestral.sql"))
+
+        cur.execute("SELECT operacao, COUNT(*) FROM cadop_delta GROUP BY operacao ORDER BY operacao")
+        for operacao, qtd in cur.fetchall():
+            print(f"   -> {operacao}: {qtd} operadora(s)")
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    print("\nOPERADORAS ATUALIZADAS A PARTIR DO DELTA DO CADOP.")
+
+
 def main():
     try:
         base_dir = os.path.dirname(os.path.abspath(__file__))
         root_dir = os.path.dirname(base_dir)
 
+        # Modo incremental: so atualiza as operadoras que mudaram no CADOP
+        if "--delta-cadop" in sys.argv:
+            atualizar_operadoras_delta(base_dir, root_dir)
+            return
+
         path_cadop = os.path.join(root_dir, "2_transformacao", "output", "relatorio_cadop.csv")
-        path_despesas = os.path.join(root_dir, "1_etl_ans", "output", "consolidado_despesas.csv")
-        path_agregado = os.path.join(root_dir, "2_transformacao", "output", "despesas_agregadas.csv")
+        path_despesas = os.path.join(root_dir, "1_etl_ans", "output", "consolidado_despesas.zip")
+        path_agregado = os.path.join(root_dir, "2_transformacao", "output", "Teste_JoaoGabriel.zip")
 
         # 2. Preparacao de Arquivos (Bypass de Permissao)
         mapa_paths = {
@@ -153,6 +199,8 @@ def main():
 
         executar_sql_arquivo(cur, os.path.join(base_dir, "2_importacao.sql"), paths_seguros)
 
+        executar_sql_arquivo(cur, os.path.join(base_dir, "5_serie_trimestral.sql"))
+
         print("\nBANCO DE DADOS POPULADO COM SUCESSO.")
         print(f"Conecte-se ao banco '{DB_NAME}' para realizar as consultas.")
 
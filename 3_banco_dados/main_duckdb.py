@@ -0,0 +1,65 @@
+import os
+import sys
+import duckdb
+
+# --- CONFIGURACOES ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+DUCKDB_PATH = os.getenv("DUCKDB_PATH") or os.path.join(OUTPUT_DIR, "intuitive_care.duckdb")
+
+PATH_CADOP = os.path.join(ROOT_DIR, "2_transformacao", "output", "relatorio_cadop.parquet")
+PATH_DESPESAS = os.path.join(ROOT_DIR, "1_etl_ans", "output", "consolidado_despesas.parquet")
+
+
+def executar_sql_arquivo(con, arquivo_sql, placeholders=None):
+    print(f"Executando script: {os.path.basename(arquivo_sql)}...")
+    with open(arquivo_sql, 'r', encoding='utf-8') as f:
+        sql = f.read()
+
+        if placeholders:
+            for key, value in placeholders.items():
+                sql = sql.replace(key, value.replace('\\', '/'))
+
+        con.execute(sql)
+        print("   -> Sucesso.")
+
+
+def main():
+    '''Gera o banco DuckDB somente leitura usado pela API no modo DB_BACKEND=duckdb'''
+    try:
+        placeholders = {'{PATH_CADOP}': PATH_CADOP, '{PATH_DESPESAS}': PATH_DESPESAS}
+        for caminho in placeholders.values():
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(
+                    f"Arquivo nao encontrado: {caminho}\n"
+                    f"Certifique-se de ter executado as Tarefas 1 e 2 com sucesso."
+                )
+
+        os.makedirs(os.path.dirname(DUCKDB_PATH), exist_ok=True)
+
+        # Gera em arquivo temporario e troca no final: replicas lendo o banco antigo nunca veem carga parcial
+        caminho_temp = DUCKDB_PATH + ".tmp"
+        if os.path.exists(caminho_temp):
+            os.remove(caminho_temp)
+
+        con = duckdb.connect(caminho_temp)
+        try:
+            executar_sql_arquivo(con, os.path.join(BASE_DIR, "6_carga_duckdb.sql"), placeholders)
+            executar_sql_arquivo(con, os.path.join(BASE_DIR, "5_serie_trimestral.sql"))
+            con.execute("CHECKPOINT")
+        finally:
+            con.close()
+
+        os.replace(caminho_temp, DUCKDB_PATH)
+
+        print(f"\nBANCO DUCKDB GERADO COM SUCESSO: {DUCKDB_PATH}")
+        print("Inicie a API com DB_BACKEND=duckdb para servir a partir deste arquivo.")
+
+    except Exception as e:
+        print(f"\nERRO FATAL: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
@@ -12,13 +12,28 @@ import re
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
 
 # Configuração Banco
+# DB_BACKEND=postgres (padrão) usa o banco da Tarefa 3; DB_BACKEND=duckdb abre o arquivo
+# gerado por 3_banco_dados/main_duckdb.py em modo somente leitura (réplicas sem servidor)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").lower()
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASS = os.getenv("DB_PASS", "postgres")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_NAME = os.getenv("DB_NAME", "intuitive_care_db")
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
+LIMITE_LOTE = int(os.getenv("LIMITE_LOTE", "50"))
+DUCKDB_PATH = os.getenv("DUCKDB_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "3_banco_dados", "output", "intuitive_care.duckdb"
+)
+
+if DB_BACKEND == "duckdb":
+    # Mesmas queries SQL via dialeto duckdb-engine; o schema do arquivo espelha o do PostgreSQL
+    engine = create_engine(f"duckdb:///{DUCKDB_PATH}", connect_args={"read_only": True})
+elif DB_BACKEND == "postgres":
+    DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}"
+    engine = create_engine(DATABASE_URL)
+else:
+    raise ValueError(f"DB_BACKEND inválido: {DB_BACKEND} (use 'postgres' ou 'duckdb')")
 
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 app = FastAPI(title="Intuitive Care API", version="1.0.0")
@@ -70,6 +85,42 @@ class Estatisticas(BaseModel):
     top_5_operadoras: List[TopItem] # Requisito 4.2
     top_estados: List[TopItem]      # Requisito 4.3 (para o gráfico)
 
+class ConsultaLote(BaseModel):
+    # Limite validado no parse do corpo, antes de qualquer processamento
+    cnpjs: List[str] = Field(default_factory=list, max_length=LIMITE_LOTE)
+    registros_ans: List[int] = Field(default_factory=list, max_length=LIMITE_LOTE)
+
+class OperadoraDetalhada(BaseModel):
+    registro_ans: int
+    cnpj: Optional[str]
+    razao_social: Optional[str]
+    uf: Optional[str]
+    modalidade: Optional[str]
+    despesas: List[DespesaHistorico]
+
+class RespostaLote(BaseModel):
+    data: List[OperadoraDetalhada]
+    nao_encontrados: List[str]
+
+class CrescimentoOperadora(BaseModel):
+    registro_ans: int
+    razao_social: Optional[str]
+    uf: Optional[str]
+    valor_inicial: float
+    valor_final: float
+    crescimento_pct: float
+
+class DespesaEstado(BaseModel):
+    uf: str
+    despesa_total_estado: float
+    media_por_operadora: float
+
+class OperadoraAcimaMedia(BaseModel):
+    registro_ans: int
+    razao_social: Optional[str]
+    uf: Optional[str]
+    qtd_trimestres_acima: int
+
 @app.get("/api/operadoras", response_model=PaginacaoOperadoras)
 def listar_operadoras(page: int = 1, limit: int = 10, search: Optional[str] = None, db: Session = Depends(get_db)):
     offset = (page - 1) * limit
@@ -117,6 +168,60 @@ def historico_despesas(cnpj: str, db: Session = Depends(get_db)):
     rows = db.execute(text(sql), {"cnpj": cnpj_limpo}).fetchall()
     return [{"ano": r.ano, "trimestre": r.trimestre, "data_referencia": str(r.data_referencia), "valor_despesa": r.valor_despesa} for r in rows]
 
+@app.post("/api/operadoras/lote", response_model=RespostaLote)
+def detalhes_operadoras_lote(consulta: ConsultaLote, db: Session = Depends(get_db)):
+    # Detalhes + histórico de várias operadoras em uma única query (evita 2 requisições por operadora)
+    limpos = [(original, limpar_cnpj(original)) for original in consulta.cnpjs]
+    # CNPJs sem nenhum dígito não podem ser buscados: voltam em nao_encontrados com o valor enviado
+    invalidos = [original for original, limpo in limpos if not limpo]
+    cnpjs = sorted({limpo for _, limpo in limpos if limpo})
+    registros = sorted(set(consulta.registros_ans))
+
+    # Mesmo status 422 da validação de tamanho de cada lista no modelo
+    if not consulta.cnpjs and not registros:
+        raise HTTPException(status_code=422, detail="Informe ao menos um CNPJ ou registro ANS")
+    if len(cnpjs) + len(registros) > LIMITE_LOTE:
+        raise HTTPException(status_code=422, detail=f"Máximo de {LIMITE_LOTE} operadoras por consulta")
+    if not cnpjs and not registros:
+        return {"data": [], "nao_encontrados": invalidos}
+
+    # = ANY(:ids): no PostgreSQL vira BitmapOr sobre idx_operadoras_cnpj_digitos e a PK; também roda no DuckDB
+    filtros = []
+    params = {}
+    if cnpjs:
+        filtros.append("REGEXP_REPLACE(o.cnpj, '\\D','','g') = ANY(:cnpjs)")
+        params["cnpjs"] = cnpjs
+    if registros:
+        filtros.append("o.registro_ans = ANY(:registros)")
+        params["registros"] = registros
+    where = " OR ".join(filtros)
+
+    sql = f"""
+        SELECT o.registro_ans, o.cnpj, o.razao_social, o.uf, o.modalidade,
+               d.ano, d.trimestre, d.data_referencia, d.valor_despesa
+        FROM operadoras o
+        LEFT JOIN despesas_contabeis d ON d.registro_ans = o.registro_ans
+        WHERE {where}
+        ORDER BY o.registro_ans, d.data_referencia DESC
+    """
+    rows = db.execute(text(sql), params).fetchall()
+
+    operadoras = {}
+    for r in rows:
+        op = operadoras.setdefault(r.registro_ans, {
+            "registro_ans": r.registro_ans, "cnpj": r.cnpj, "razao_social": r.razao_social,
+            "uf": r.uf, "modalidade": r.modalidade, "despesas": []
+        })
+        if r.ano is not None:
+            op["despesas"].append({"ano": r.ano, "trimestre": r.trimestre, "data_referencia": str(r.data_referencia),
+                                   "valor_despesa": r.valor_despesa})
+
+    encontrados_cnpj = {limpar_cnpj(op["cnpj"] or "") for op in operadoras.values()}
+    nao_encontrados = invalidos + [c for c in cnpjs if c not in encontrados_cnpj]
+    nao_encontrados += [str(r) for r in registros if r not in operadoras]
+
+    return {"data": list(operadoras.values()), "nao_encontrados": nao_encontrados}
+
 @app.get("/api/estatisticas", response_model=Estatisticas)
 def obter_estatisticas(db: Session = Depends(get_db)):
     # 1. Totais Gerais
@@ -144,6 +249,96 @@ def obter_estatisticas(db: Session = Depends(get_db)):
         "top_estados": [{"nome": r.uf, "total": r.total} for r in top_uf_raw]
     }
 
+# --- Analiticas (servidas pela tabela pre-calculada serie_trimestral_operadora) ---
+
+@app.get("/api/analiticas/crescimento", response_model=List[CrescimentoOperadora])
+def operadoras_maior_crescimento(
+    limit: int = Query(5, ge=1, le=100),
+    uf: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # Equivalente a QUERY 1 de 3_queries_analiticas.sql: primeiro vs ultimo trimestre com dados da operadora
+    # (valores somados por trimestre; trimestres sem despesa nao entram no calculo)
+    sql = """
+        SELECT s.registro_ans, o.razao_social, o.uf,
+               s.valor_primeiro_trimestre AS valor_inicial,
+               s.valor_despesa AS valor_final,
+               s.crescimento_acumulado_pct AS crescimento_pct
+        FROM serie_trimestral_operadora s
+        JOIN operadoras o ON s.registro_ans = o.registro_ans
+        WHERE s.ultimo_trimestre AND s.valor_primeiro_trimestre > 0
+    """
+    params = {"limit": limit}
+
+    if uf:
+        sql += " AND o.uf = :uf"
+        params["uf"] = uf.upper()
+    if modalidade:
+        sql += " AND o.modalidade ILIKE :modalidade"
+        params["modalidade"] = f"%{modalidade}%"
+
+    sql += " ORDER BY s.crescimento_acumulado_pct DESC LIMIT :limit"
+    rows = db.execute(text(sql), params).fetchall()
+    return [{"registro_ans": r.registro_ans, "razao_social": r.razao_social, "uf": r.uf, "valor_inicial": r.valor_inicial,
+             "valor_final": r.valor_final, "crescimento_pct": r.crescimento_pct} for r in rows]
+
+@app.get("/api/analiticas/estados", response_model=List[DespesaEstado])
+def estados_maior_despesa(
+    limit: int = Query(5, ge=1, le=27),
+    ano: Optional[int] = None,
+    trimestre: Optional[int] = Query(None, ge=1, le=4),
+    db: Session = Depends(get_db),
+):
+    # Equivalente a QUERY 2: total por UF e media por operadora com despesa no periodo
+    sql = """
+        SELECT o.uf,
+               SUM(s.valor_despesa) AS despesa_total_estado,
+               ROUND(SUM(s.valor_despesa) / NULLIF(COUNT(DISTINCT s.registro_ans) FILTER (WHERE s.possui_dados), 0), 2) AS media_por_operadora
+        FROM serie_trimestral_operadora s
+        JOIN operadoras o ON s.registro_ans = o.registro_ans
+        WHERE o.uf IS NOT NULL
+    """
+    params = {"limit": limit}
+
+    if ano:
+        sql += " AND s.ano = :ano"
+        params["ano"] = ano
+    if trimestre:
+        sql += " AND s.trimestre = :trimestre"
+        params["trimestre"] = trimestre
+
+    sql += " GROUP BY o.uf ORDER BY despesa_total_estado DESC LIMIT :limit"
+    rows = db.execute(text(sql), params).fetchall()
+    return [{"uf": r.uf, "despesa_total_estado": r.despesa_total_estado, "media_por_operadora": r.media_por_operadora or 0} for r in rows]
+
+@app.get("/api/analiticas/acima-media", response_model=List[OperadoraAcimaMedia])
+def operadoras_acima_media(
+    min_trimestres: int = Query(2, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    uf: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # Variante da QUERY 3 sobre totais trimestrais: conta TRIMESTRES em que o total da operadora superou a media
+    # dos totais das operadoras. A QUERY 3 compara cada linha de despesas_contabeis (uma por conta contabil) com a
+    # media das linhas, entao conta linhas e nao trimestres; os numeros das duas nao coincidem
+    sql = """
+        SELECT s.registro_ans, o.razao_social, o.uf, s.qtd_trimestres_acima
+        FROM serie_trimestral_operadora s
+        JOIN operadoras o ON s.registro_ans = o.registro_ans
+        WHERE s.ultimo_trimestre AND s.qtd_trimestres_acima >= :min_trimestres
+    """
+    params = {"min_trimestres": min_trimestres, "limit": limit}
+
+    if uf:
+        sql += " AND o.uf = :uf"
+        params["uf"] = uf.upper()
+
+    sql += " ORDER BY s.qtd_trimestres_acima DESC, s.registro_ans LIMIT :limit"
+    rows = db.execute(text(sql), params).fetchall()
+    return [{"registro_ans": r.registro_ans, "razao_social": r.razao_social, "uf": r.uf,
+             "qtd_trimestres_acima": r.qtd_trimestres_acima} for r in rows]
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,134 @@
+import io
+import os
+import json
+import shutil
+import zipfile
+import zlib
+from contextlib import contextmanager
+
+# Compartilhado pelas Tarefas 1, 2 e 3: grava e le os artefatos CSV compactados do pipeline
+
+# Compressao dos artefatos: deflate (padrao) ou zstd (so no Python 3.14+, que traz zipfile.ZIP_ZSTANDARD).
+# Para priorizar velocidade, use ZIP_NIVEL=1 (deflate); o padrao 6 mantem o tamanho dos ZIPs anteriores
+ZIP_COMPRESSAO = os.getenv("ZIP_COMPRESSAO", "deflate").lower()
+ZIP_NIVEL = int(os.getenv("ZIP_NIVEL", "6"))
+LINHAS_POR_BLOCO = 100_000
+
+
+def metodos_compressao():
+    '''Metodos disponiveis neste Python e a faixa de niveis aceita por cada um'''
+    metodos = {'deflate': (zipfile.ZIP_DEFLATED, range(0, 10))}
+    if hasattr(zipfile, 'ZIP_ZSTANDARD'):  # Python 3.14+
+        from compression.zstd import CompressionParameter
+        minimo, maximo = CompressionParameter.compression_level.bounds()
+        metodos['zstd'] = (zipfile.ZIP_ZSTANDARD, range(minimo, maximo + 1))
+    return metodos
+
+
+def validar_compressao(nome, nivel):
+    metodos = metodos_compressao()
+    if nome not in metodos:
+        raise Exception(f"ZIP_COMPRESSAO '{nome}' nao suportada neste Python. Opcoes: {', '.join(metodos)}")
+    metodo, niveis = metodos[nome]
+    if nivel not in niveis:
+        raise Exception(f"ZIP_NIVEL {nivel} invalido para {nome} (aceita {niveis.start} a {niveis.stop - 1}).")
+    return metodo
+
+
+# Valida na importacao: configuracao errada falha antes do download/processamento, nao na gravacao
+ZIP_METODO = validar_compressao(ZIP_COMPRESSAO, ZIP_NIVEL)
+
+
+def caminho_manifesto(caminho_zip):
+    return os.path.splitext(caminho_zip)[0] + "_blocos.json"
+
+
+def salvar_csv_zip(df, caminho_zip, nome_membro, **to_csv_kwargs):
+    '''Grava o DataFrame como CSV direto no membro do ZIP, em blocos, sem copia descompactada em disco.
+    Salva ao lado um manifesto com o CRC32 de cada bloco'''
+    blocos = []
+    with zipfile.ZipFile(caminho_zip, 'w', ZIP_METODO, compresslevel=ZIP_NIVEL) as zf:
+        with zf.open(nome_membro, 'w', force_zip64=True) as membro:
+            for inicio in range(0, max(len(df), 1), LINHAS_POR_BLOCO):
+                bloco = df.iloc[inicio:inicio + LINHAS_POR_BLOCO]
+                dados = bloco.to_csv(index=False, header=(inicio == 0), **to_csv_kwargs).encode('utf-8')
+                membro.write(dados)
+                blocos.append({
+                    'bloco': len(blocos),
+                    'linhas': len(bloco),
+                    'bytes': len(dados),
+                    'crc32': f"{zlib.crc32(dados):08x}",
+                })
+
+    with open(caminho_manifesto(caminho_zip), 'w', encoding='utf-8') as f:
+        json.dump({'membro': nome_membro, 'compressao': ZIP_COMPRESSAO, 'nivel': ZIP_NIVEL, 'blocos': blocos}, f, indent=2)
+
+
+class LeitorVerificado(io.RawIOBase):
+    '''Le o membro do ZIP conferindo o CRC32 de cada bloco do manifesto a medida que os bytes sao consumidos'''
+
+    def __init__(self, membro, blocos, nome):
+        self._membro = membro
+        self._blocos = blocos
+        self._nome = nome
+        self._indice = 0
+        self._crc = 0
+        self._restante = blocos[0]['bytes'] if blocos else 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._indice < len(self._blocos) and self._restante == 0:
+            self._fechar_bloco()
+
+        if self._indice >= len(self._blocos):
+            if self._membro.read(1):
+                raise Exception(f"{self._nome} tem dados alem dos blocos do manifesto.")
+            return 0
+
+        dados = self._membro.read(min(len(buffer), self._restante))
+        if not dados:
+            raise Exception(f"{self._nome} termina antes do bloco {self._indice} do manifesto.")
+
+        buffer[:len(dados)] = dados
+        self._crc = zlib.crc32(dados, self._crc)
+        self._restante -= len(dados)
+        if self._restante == 0:
+            self._fechar_bloco()
+        return len(dados)
+
+    def _fechar_bloco(self):
+        bloco = self._blocos[self._indice]
+        if f"{self._crc:08x}" != bloco['crc32']:
+            raise Exception(f"Bloco {bloco['bloco']} de {self._nome} corrompido (CRC32 divergente).")
+        self._indice += 1
+        self._crc = 0
+        self._restante = self._blocos[self._indice]['bytes'] if self._indice < len(self._blocos) else 0
+
+
+@contextmanager
+def abrir_csv_zip(caminho_zip):
+    '''Abre o CSV do ZIP como arquivo binario, verificando os blocos durante a leitura (uma unica descompressao).
+    Ao sair do bloco `with` sem erro, o restante do membro e conferido ate o fim'''
+    manifesto_path = caminho_manifesto(caminho_zip)
+    if not os.path.exists(manifesto_path):
+        raise FileNotFoundError(f"Manifesto de blocos nao encontrado: {manifesto_path}. Gere o artefato novamente.")
+
+    with open(manifesto_path, 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    with zipfile.ZipFile(caminho_zip) as zf, zf.open(manifesto['membro']) as membro:
+        bruto = LeitorVerificado(membro, manifesto['blocos'], os.path.basename(caminho_zip))
+        yield io.BufferedReader(bruto, buffer_size=1024 * 1024)
+
+        # Confere o que nao foi lido (mesmo que o chamador tenha fechado o arquivo)
+        resto = bytearray(1024 * 1024)
+        while bruto.readinto(resto):
+            pass
+
+
+def verificar_csv_zip(caminho_zip, destino):
+    '''Extrai o CSV do ZIP para `destino` (arquivo binario aberto) conferindo o CRC32 de cada bloco'''
+    with abrir_csv_zip(caminho_zip) as origem:
+        shutil.copyfileobj(origem, destino, 1024 * 1024)